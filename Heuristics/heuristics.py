@@ -1,17 +1,26 @@
 # heuristics.py
 import re
-import os
 import json
+import time
 import requests
+import ahocorasick
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+try:
+    import orjson  # optional, faster JSON parsing
+except ImportError:
+    orjson = None
 
 """
 ===========================================================
  Heuristics Module
 ===========================================================
 Provides:
-1) sanitize_input(query, allowed_tools)
-2) validate_input(query, allowed_tools)
+1) sanitize_input(query, allowed_tools) -> (sanitized, refs)
+2) validate_input(query, allowed_tools, refs=None)
 3) run_heuristics(query, allowed_tools)
 4) HeuristicResult class
 ===========================================================
@@ -23,7 +32,7 @@ Provides:
 
 ADULT_KEYWORDS = [
     "porn", "xxx", "bdsm", "nude", "adult video",
-    "deep-throat", "sex ", "hookup", "horny"
+    "deep-throat", "sex", "hookup", "horny"
 ]
 
 RACIAL_SLURS = [
@@ -46,6 +55,115 @@ SECRET_KEY_PATTERNS = [
 ]
 
 MAX_ALLOWED_INPUT_SIZE_MB = 5  # adjustable limit
+MAX_URL_CHECK_WORKERS = 16
+
+CHECK_URLS = True              # set False to skip live URL checks entirely
+URL_CHECK_TTL_SECONDS = 300    # how long a URL check result is reused
+URL_CHECK_SKIP_HOSTS = {       # trusted hosts, never checked over the network
+    "localhost", "127.0.0.1", "theschoolof.ai",
+}
+
+# Shared session so HEAD checks reuse pooled TCP/TLS connections
+_HTTP = requests.Session()
+
+# Compiled once at import so the hot path skips re's pattern-cache lookup
+_SECRET_KEY_RE = [re.compile(p, re.I) for p in SECRET_KEY_PATTERNS]
+_SYSTEM_OVERRIDE_RE = [re.compile(p, re.I) for p in SYSTEM_OVERRIDE_PATTERNS]
+# A keyword must start a word; the rest of that word (plurals, longer
+# forms such as "pornography") is masked along with it
+_ADULT_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, ADULT_KEYWORDS)) + r")\w*", re.I)
+_SLUR_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, RACIAL_SLURS)) + r")\w*", re.I)
+
+
+def _build_automaton(words: list):
+    """Builds an Aho-Corasick automaton over the lowercased keywords."""
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word.lower(), len(word))
+    automaton.make_automaton()
+    return automaton
+
+
+_ADULT_AC = _build_automaton(ADULT_KEYWORDS)
+_SLUR_AC = _build_automaton(RACIAL_SLURS)
+
+# Only the "key: {" head is matched by regex; the block it opens is found by
+# brace matching (see _remove_blocks), which stays linear on crafted input
+# where a lazy `\{.*?\}` under re.S would rescan the tail for every head
+_NESTED_QUERY_RE = re.compile(r"query\s*:\s*\{", re.I)
+_PROMPT_RE = re.compile(r"prompt\s*:\s*\{", re.I)
+_BRACE_RE = re.compile(r"[{}]")
+# Characters that can change _iter_json_spans' state; everything else is skipped in C
+_JSON_TOKEN_RE = re.compile(r'[{}"\\]')
+
+# Literal fragments that every sanitize rule needs in order to match.
+# Keep in sync with the patterns above: a query containing none of them
+# cannot be changed by any substitution, so sanitize_input skips them all.
+_TRIGGER_WORDS = [
+    "api", "password", "sk-",                                  # secrets
+    "ignore", "override", "reset", "break free", "command",    # overrides
+    "query", "prompt", "tool:",                                # nesting / tools
+]
+# Plain substring checks on the lowercased text: a case-insensitive regex
+# union of all of these is several times slower on long harmless queries
+_TRIGGER_WORDS_LOWER = [w.lower() for w in _TRIGGER_WORDS + ADULT_KEYWORDS + RACIAL_SLURS]
+
+
+def _has_trigger(text: str) -> bool:
+    low = text.lower()
+    return any(w in low for w in _TRIGGER_WORDS_LOWER)
+
+_TOOL_RE = re.compile(r"tool:([A-Za-z_]+)")
+
+# URL, file and tool references in one left-to-right pass; each alternative
+# has exactly one named group, so m.lastgroup says which kind matched
+_REF_RE = re.compile(
+    r"(?P<urls>https?://\S+)"
+    r"|(?:file:|path:)\s*(?P<files>\S+)"
+    r"|tool:(?P<tools>[A-Za-z_]+)"
+)
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+def _mask_keywords(text: str, automaton, pattern, replacement: str) -> str:
+    """
+    Replaces keyword hits that start a word, together with the rest of that
+    word, in a single pass over the text with the Aho-Corasick automaton;
+    gives the same result as pattern.sub.
+    """
+    # Non-ASCII text goes to the regex: re.I also matches case variants such
+    # as "ſ" for "s", which lower() leaves alone, and lower() can change the
+    # length of some non-ASCII text, which would make spans drift
+    if not text.isascii():
+        return pattern.sub(replacement, text)
+    low = text.lower()
+
+    spans = []
+    for end, length in automaton.iter(low):
+        start = end - length + 1
+        if start > 0 and _is_word_char(low[start - 1]):
+            continue
+        end += 1
+        while end < len(low) and _is_word_char(low[end]):
+            end += 1
+        spans.append((start, end))
+
+    if not spans:
+        return text
+
+    parts = []
+    last = 0
+    for start, end in sorted(spans, key=lambda s: (s[0], -s[1])):
+        if start < last:
+            continue  # overlaps a hit we already replaced
+        parts.append(text[last:start])
+        parts.append(replacement)
+        last = end
+    parts.append(text[last:])
+    return "".join(parts)
 
 
 # -------------------------------------------------
@@ -63,92 +181,253 @@ class HeuristicResult:
 #  Function 1: Sanitizer
 # -------------------------------------------------
 
+def _too_large(query: str) -> bool:
+    """True if the UTF-8 size exceeds the limit; encodes only when undecidable."""
+    limit = MAX_ALLOWED_INPUT_SIZE_MB * 1024 * 1024
+    # UTF-8 uses 1-4 bytes per char, so the char count bounds the byte count
+    if len(query) > limit:
+        return True
+    if len(query) * 4 <= limit:
+        return False
+    return len(query.encode("utf-8", "ignore")) > limit
+
+
+def _matching_braces(text: str) -> dict:
+    """Maps the index of each balanced "{" to the index of its "}"."""
+    pairs = {}
+    stack = []
+    for m in _BRACE_RE.finditer(text):
+        if m.group() == "{":
+            stack.append(m.start())
+        elif stack:
+            pairs[stack.pop()] = m.start()
+    return pairs
+
+
+def _remove_blocks(text: str, head_re, replacement: str) -> str:
+    """Replaces each head_re match together with the {...} block it opens."""
+    heads = list(head_re.finditer(text))
+    if not heads:
+        return text
+
+    pairs = _matching_braces(text)
+    parts = []
+    last = 0
+    for m in heads:
+        if m.start() < last:
+            continue  # inside a block that was already removed
+        close = pairs.get(m.end() - 1)
+        if close is None:
+            # Unbalanced: cut at the first "}" as the old lazy pattern did
+            close = text.find("}", m.end())
+            if close == -1:
+                break  # no "}" left for this or any later head
+        parts.append(text[last:m.start()])
+        parts.append(replacement)
+        last = close + 1
+    parts.append(text[last:])
+    return "".join(parts)
+
+
+def _strip_non_ascii(text: str) -> str:
+    # isascii() is O(1) on CPython's compact strings, so the common
+    # all-ASCII query is returned as-is without allocating a copy
+    if text.isascii():
+        return text
+    return text.encode("ascii", "ignore").decode()
+
+
+def _extract_refs(text: str, tools: list = None) -> dict:
+    """
+    URL, file, JSON and tool references that validate_input checks.
+    Pass tools when they are already known to skip collecting them.
+    """
+    refs = {"tools": [], "urls": [], "files": []}
+    for m in _REF_RE.finditer(text):
+        kind = m.lastgroup
+        refs[kind].append(m.group(kind))
+    if tools is not None:
+        refs["tools"] = tools
+    refs["json_spans"] = list(_iter_json_spans(text)) if "{" in text else []
+    return refs
+
+
 def sanitize_input(query: str, allowed_tools: list):
-    """Removes sensitive, malicious, or disallowed content."""
+    """
+    Removes sensitive, malicious, or disallowed content.
+    Returns (sanitized, refs) where refs holds the references found in the
+    sanitized text, so validate_input does not have to scan for them again.
+    """
+
+    # (4) Reject oversized inputs before doing any regex work on them
+    if _too_large(query):
+        return "[ERROR: Input too large]", {}
+
+    # Fast path: an ASCII query with none of the trigger fragments cannot be
+    # changed by any rule. Non-ASCII text always takes the full path: the re.I
+    # rules also match case variants such as "ſ" or "ı", and stripping can
+    # join a trigger back together (e.g. "toéol:x" becomes "tool:x")
+    if query.isascii() and not _has_trigger(query):
+        return query, _extract_refs(query)
 
     sanitized = query
 
     # (1) Remove secret keys
-    for pattern in SECRET_KEY_PATTERNS:
-        sanitized = re.sub(pattern, "[REDACTED_SECRET]", sanitized, flags=re.I)
+    for pattern in _SECRET_KEY_RE:
+        sanitized = pattern.sub("[REDACTED_SECRET]", sanitized)
 
     # (2) Remove prompt override attacks
-    for pattern in SYSTEM_OVERRIDE_PATTERNS:
-        sanitized = re.sub(pattern, "[SYSTEM_OVERRIDE_BLOCKED]", sanitized, flags=re.I)
+    for pattern in _SYSTEM_OVERRIDE_RE:
+        sanitized = pattern.sub("[SYSTEM_OVERRIDE_BLOCKED]", sanitized)
 
     # (3) Remove adult content
-    for word in ADULT_KEYWORDS:
-        sanitized = re.sub(word, "[ADULT_BLOCKED]", sanitized, flags=re.I)
-
-    # (4) Remove oversized inputs
-    if len(sanitized.encode("utf-8")) > MAX_ALLOWED_INPUT_SIZE_MB * 1024 * 1024:
-        return "[ERROR: Input too large]"
+    sanitized = _mask_keywords(sanitized, _ADULT_AC, _ADULT_RE, "[ADULT_BLOCKED]")
 
     # (5) Remove query-inside-query
-    sanitized = re.sub(r"(query\s*:\s*\{.*?\})",
-                       "[NESTED_QUERY_REMOVED]", sanitized, flags=re.I | re.S)
+    sanitized = _remove_blocks(sanitized, _NESTED_QUERY_RE, "[NESTED_QUERY_REMOVED]")
 
     # (10) Remove racial slurs
-    for slur in RACIAL_SLURS:
-        sanitized = re.sub(slur, "[OFFENSIVE_CONTENT_REMOVED]", sanitized, flags=re.I)
+    sanitized = _mask_keywords(sanitized, _SLUR_AC, _SLUR_RE, "[OFFENSIVE_CONTENT_REMOVED]")
 
     # (11) Remove “prompt inside prompt”
-    sanitized = re.sub(r"(prompt\s*:\s*\{.*?\})",
-                       "[PROMPT_REMOVED]", sanitized, flags=re.I | re.S)
+    sanitized = _remove_blocks(sanitized, _PROMPT_RE, "[PROMPT_REMOVED]")
 
     # (12) Remove non-ASCII
-    sanitized = sanitized.encode("ascii", "ignore").decode()
-
-    # (13) Remove/replace unknown tool names
-    tool_pattern = re.findall(r"\btool:([A-Za-z_]+)\b", sanitized)
-    for t in tool_pattern:
-        if t not in allowed_tools:
+    sanitized = _strip_non_ascii(sanitized)
+
+    # (13) Remove/replace unknown tool names; the allowed ones stay referenced
+    tools = []
+    for t in _TOOL_RE.findall(sanitized):
+        if t in allowed_tools:
+            tools.append(t)
+        else:
             sanitized = sanitized.replace(t, "[UNKNOWN_TOOL]")
 
-    return sanitized
+    return sanitized, _extract_refs(sanitized, tools)
 
 
 # -------------------------------------------------
 #  Function 2: Validator
 # -------------------------------------------------
 
-def validate_input(query: str, allowed_tools: list):
-    """Validates URLs, files, JSON, and tool references."""
-
-    # (6) URL existence check
-    urls = re.findall(r"https?://\S+", query)
-    for url in urls:
+def _check_url(url: str):
+    """Returns an error message if the URL is missing or unreachable, else None."""
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        host = None
+    if host in URL_CHECK_SKIP_HOSTS:
+        return None
+    # Results are reused within a TTL bucket; the bucket changes every TTL seconds
+    try:
+        return _check_url_cached(url, int(time.time() // URL_CHECK_TTL_SECONDS))
+    except Exception:
+        return f"[ERROR: Invalid or unreachable URL → {url}]"
+
+
+@lru_cache(maxsize=4096)
+def _check_url_cached(url: str, ttl_bucket: int):
+    # Only a status code settles the answer. Network errors propagate, and
+    # lru_cache does not memoize a call that raised, so a timeout or DNS
+    # hiccup is re-checked next time instead of failing the URL for the TTL
+    r = _HTTP.head(url, timeout=4)
+    if r.status_code >= 400:
+        return f"[ERROR: URL does not exist → {url}]"
+    return None
+
+
+def _iter_json_spans(text: str):
+    """
+    Yields (start, end) of top-level {...} blocks in one linear pass,
+    tracking brace depth and ignoring braces inside string literals.
+    """
+    first = text.find("{")
+    if first == -1:
+        return
+
+    depth = 0
+    start = -1
+    in_string = False
+    skip_to = first  # a backslash in a string hides the char right after it
+    for m in _JSON_TOKEN_RE.finditer(text, first):
+        i = m.start()
+        if i < skip_to:
+            continue
+        c = m.group()
+        if in_string:
+            if c == "\\":
+                skip_to = i + 2
+            elif c == '"':
+                in_string = False
+        elif c == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+        elif c == '"' and depth:
+            in_string = True
+
+    # Unclosed block: still hand over what ends at the last "}" so it fails to parse
+    if depth:
+        end = text.rfind("}", start)
+        if end != -1:
+            yield start, end + 1
+
+
+def _is_json(block: str) -> bool:
+    """json.loads semantics; orjson is only a fast path for blocks that parse."""
+    if orjson is not None:
         try:
-            r = requests.head(url, timeout=4)
-            if r.status_code >= 400:
-                return False, f"[ERROR: URL does not exist → {url}]"
-        except Exception:
-            return False, f"[ERROR: Invalid or unreachable URL → {url}]"
-
-    # (7) File existence check
-    files = re.findall(r"(?:file:|path:)\s*(\S+)", query)
-    for f in files:
-        if not os.path.exists(f):
-            return False, f"[ERROR: File not found → {f}]"
-
-    # (8) Corrupted file check
-    for f in files:
+            orjson.loads(block)
+            return True
+        except orjson.JSONDecodeError:
+            pass  # orjson is stricter (NaN, Infinity, huge ints), let json decide
+    try:
+        json.loads(block)
+        return True
+    except Exception:
+        return False
+
+
+def validate_input(query: str, allowed_tools: list, refs: dict = None):
+    """
+    Validates URLs, files, JSON, and tool references.
+    refs comes from sanitize_input; without it the query is scanned here.
+    """
+    if refs is None:
+        refs = _extract_refs(query)
+
+    # (6) URL existence check — HEAD requests run concurrently,
+    # errors are still reported in the order the URLs appear
+    urls = list(dict.fromkeys(refs["urls"])) if CHECK_URLS else []
+    if urls:
+        workers = min(MAX_URL_CHECK_WORKERS, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for err in executor.map(_check_url, urls):
+                if err:
+                    return False, err
+
+    # (7) + (8) File existence and corrupted file check: one open per
+    # distinct path, a missing file surfaces as FileNotFoundError
+    for f in dict.fromkeys(refs["files"]):
         try:
             with open(f, "rb") as fp:
                 fp.read(2048)  # attempt to read basic header
+        except FileNotFoundError:
+            return False, f"[ERROR: File not found → {f}]"
         except Exception:
             return False, f"[ERROR: Corrupted or unreadable file → {f}]"
 
     # (9) Invalid JSON detection
-    json_candidates = re.findall(r"\{.*?\}", query, flags=re.S)
-    for block in json_candidates:
-        try:
-            json.loads(block)
-        except Exception:
+    for start, end in refs["json_spans"]:
+        if not _is_json(query[start:end]):
             return False, "[ERROR: Invalid JSON detected]"
 
     # (13) Tool validation
-    for tool in re.findall(r"tool:([A-Za-z_]+)", query):
+    for tool in refs["tools"]:
         if tool not in allowed_tools:
             return False, f"[ERROR: Tool '{tool}' is not allowed]"
 
@@ -167,13 +446,13 @@ def run_heuristics(raw_query: str, allowed_tools: list) -> HeuristicResult:
     2. Validates cleaned input.
     3. Returns a structured result.
     """
-    sanitized = sanitize_input(raw_query, allowed_tools)
+    sanitized, refs = sanitize_input(raw_query, allowed_tools)
 
     # If sanitization produced a direct error
     if sanitized.startswith("[ERROR"):
         return HeuristicResult(is_valid=False, sanitized_query=sanitized, error_message=sanitized)
 
-    is_valid, err = validate_input(sanitized, allowed_tools)
+    is_valid, err = validate_input(sanitized, allowed_tools, refs)
 
     if is_valid:
         return HeuristicResult(is_valid=True, sanitized_query=sanitized)
@@ -3,59 +3,135 @@
 import asyncio
 from dotenv import load_dotenv
 import os
-import yaml
+from core.config import load_profile
 from core.loop import AgentLoop
 from core.session import MultiMCP
 from core.context import AgentContext
+from modules._logutil import log
 import datetime
 import json
+import re
 from pathlib import Path
 from difflib import SequenceMatcher
 
-def log(stage: str, msg: str):
-    """Timestamped logger that writes to both console and file."""
-    now = datetime.datetime.now().strftime("%H:%M:%S")
-    log_msg = f"[{now}] [{stage}] {msg}"
-    
-    # Print to console
-    print(log_msg)
-    
-    # Write to log file
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    log_file = log_dir / "agent.log"
-    
-    try:
-        with open(log_file, 'a', encoding='utf-8') as f:
-            f.write(log_msg + '\n')
-    except Exception as e:
-        print(f"[{now}] [log] Failed to write to log file: {e}")
+try:
+    import orjson  # optional, faster JSON encode/decode
+except ImportError:
+    orjson = None
+
+_WORD_RE = re.compile(r"\w+")
 
 class ConversationHistory:
     """Manages historical conversation storage and similarity matching."""
-    def __init__(self, filepath: str = "historical_conversation_store.json"):
+    def __init__(self, filepath: str = "historical_conversation_store.jsonl"):
         self.filepath = Path(filepath)
         self.history = self._load()
+        # Lowercased/stripped queries, aligned with self.history
+        self._normalized: list[str] = []
+        # Inverted index: lowercased word -> indices of history entries using it
+        self._index: dict[str, set[int]] = {}
+        for entry in self.history:
+            self._index_entry(entry["query"])
     
+    @staticmethod
+    def _dumps(entry: dict) -> str:
+        if orjson is not None:
+            return orjson.dumps(entry).decode("utf-8")
+        return json.dumps(entry, ensure_ascii=False)
+
+    @staticmethod
+    def _loads(line: str) -> dict:
+        if orjson is not None:
+            return orjson.loads(line)
+        return json.loads(line)
+
     def _load(self) -> list:
-        """Load conversation history from JSON file."""
-        if self.filepath.exists():
-            try:
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                log("history", f"Failed to load history: {e}")
-                return []
-        return []
+        """Load conversation history from the JSONL file (one entry per line)."""
+        if not self.filepath.exists():
+            return self._migrate_legacy()
+        history = []
+        bad_lines = 0
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                for line_no, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        history.append(self._loads(line))
+                    except Exception as e:
+                        # e.g. a torn last line after a crash mid-append
+                        log("history", f"Skipping bad history line {line_no}: {e}")
+                        bad_lines += 1
+        except Exception as e:
+            log("history", f"Failed to load history: {e}")
+            return []
+        if bad_lines:
+            # Drop the bad lines so later appends start on a clean line
+            self._compact(history)
+        return history
+
+    def _migrate_legacy(self) -> list:
+        """Convert a pre-JSONL history file (single JSON array) if one exists."""
+        legacy = self.filepath.with_suffix(".json")
+        if legacy == self.filepath or not legacy.exists():
+            return []
+        try:
+            with open(legacy, 'r', encoding='utf-8') as f:
+                history = json.load(f)
+        except Exception as e:
+            log("history", f"Failed to load legacy history: {e}")
+            return []
+        self._compact(history)
+        log("history", f"Migrated {len(history)} entries from {legacy} to {self.filepath}")
+        return history
+
+    def _compact(self, history: list):
+        """Rewrite the whole JSONL file from the given entries."""
+        try:
+            tmp = self.filepath.with_suffix(self.filepath.suffix + ".tmp")
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.writelines(self._dumps(entry) + "\n" for entry in history)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.filepath)
+        except Exception as e:
+            log("history", f"Failed to rewrite history: {e}")
     
-    def _save(self):
-        """Save conversation history to JSON file."""
+    def _save(self, entry: dict):
+        """Append one conversation entry to the JSONL file."""
         try:
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.history, f, indent=2, ensure_ascii=False)
+            with open(self.filepath, 'a', encoding='utf-8') as f:
+                f.write(self._dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
         except Exception as e:
             log("history", f"Failed to save history: {e}")
     
+    def _index_entry(self, query: str):
+        """Record the next history entry's normalized query and words."""
+        idx = len(self._normalized)
+        normalized = query.lower().strip()
+        self._normalized.append(normalized)
+        for word in set(_WORD_RE.findall(normalized)):
+            self._index.setdefault(word, set()).add(idx)
+
+    def _candidates(self, query: str) -> list:
+        """Indices of entries sharing at least one word with the query (all if it has none)."""
+        words = set(_WORD_RE.findall(query))
+        if not words:
+            return list(range(len(self.history)))
+        hits = set()
+        for word in words:
+            hits |= self._index.get(word, set())
+        return list(hits)
+
+    @staticmethod
+    def _bounded_ratio(sm: SequenceMatcher, threshold: float) -> float:
+        """ratio(), or 0.0 when the cheap upper bounds already fall below threshold."""
+        if sm.real_quick_ratio() < threshold or sm.quick_ratio() < threshold:
+            return 0.0
+        return sm.ratio()
+
     def similarity(self, str1: str, str2: str) -> float:
         """Calculate similarity ratio between two strings (0.0 to 1.0)."""
         return SequenceMatcher(None, str1.lower().strip(), str2.lower().strip()).ratio()
@@ -64,12 +140,30 @@ class ConversationHistory:
         """Search for similar queries in history. Returns best match above threshold."""
         best_match = None
         best_score = 0.0
-        
-        for entry in self.history:
-            score = self.similarity(query, entry["query"])
-            if score > best_score and score >= threshold:
+        best_idx = -1
+
+        # The query is the fixed side: set_seq2 builds its b2j index once and
+        # each history entry is swapped in through the cheap set_seq1.
+        query = query.lower().strip()
+        sm = SequenceMatcher(None, autojunk=False)
+        sm.set_seq2(query)
+
+        # Only run SequenceMatcher on entries that share a word with the query.
+        # Closest lengths go first so an early match raises the bar and the
+        # length-only bound rejects most remaining entries without ratio().
+        candidates = self._candidates(query)
+        candidates.sort(key=lambda i: abs(len(self._normalized[i]) - len(query)))
+
+        for idx in candidates:
+            sm.set_seq1(self._normalized[idx])
+            score = self._bounded_ratio(sm, max(threshold, best_score))
+            if score < threshold:
+                continue
+            # Ties go to the older entry, as with a plain in-order scan
+            if score > best_score or (best_match is not None and score == best_score and idx < best_idx):
                 best_score = score
-                best_match = entry
+                best_match = self.history[idx]
+                best_idx = idx
         
         if best_match:
             log("history", f"Found similar query (similarity: {best_score:.2%}): {best_match['query'][:60]}...")
@@ -84,7 +178,8 @@ class ConversationHistory:
             "timestamp": datetime.datetime.now().isoformat()
         }
         self.history.append(entry)
-        self._save()
+        self._index_entry(query)
+        self._save(entry)
         log("history", f"Saved conversation: {query[:60]}...")
 
 async def main():
@@ -100,10 +195,9 @@ async def main():
     # Initialize conversation history
     conv_history = ConversationHistory()
 
-    with open("config/profiles.yaml", "r") as f:
-        profile = yaml.safe_load(f)
-        mcp_servers_list = profile.get("mcp_servers", [])
-        mcp_servers = {server["id"]: server for server in mcp_servers_list}
+    profile = load_profile()
+    mcp_servers_list = profile.get("mcp_servers", [])
+    mcp_servers = {server["id"]: server for server in mcp_servers_list}
 
     multi_mcp = MultiMCP(server_configs=list(mcp_servers.values()))
     await multi_mcp.initialize()
@@ -143,15 +237,17 @@ async def main():
 
                 if isinstance(result, dict):
                     answer = result["result"]
-                    if "FINAL_ANSWER:" in answer:
-                        final_answer = answer.split('FINAL_ANSWER:')[1].strip()
+                    # partition stops at the first sentinel instead of splitting the whole answer
+                    _, found, final_answer = answer.partition("FINAL_ANSWER:")
+                    if found:
+                        final_answer = final_answer.strip()
                         log("agent", f"💡 Final Answer: {final_answer}")
                         # Save to conversation history ONLY for successful final answers
                         original_query = context.user_input if hasattr(context, 'user_input') else user_input
                         conv_history.add(original_query, final_answer)
                         break
                     elif "FURTHER_PROCESSING_REQUIRED:" in answer:
-                        user_input = answer.split("FURTHER_PROCESSING_REQUIRED:")[1].strip()
+                        user_input = answer.partition("FURTHER_PROCESSING_REQUIRED:")[2].strip()
                         log("agent", f"🔁 Further Processing Required: {user_input}")
                         continue  # 🧠 Re-run agent with updated input
                     else:
@@ -166,6 +262,12 @@ async def main():
         log("agent", "👋 Received exit signal. Shutting down...")
 
 if __name__ == "__main__":
+    # libuv-based event loop when available
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
 
 
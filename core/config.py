@@ -0,0 +1,25 @@
+# core/config.py
+
+import os
+from functools import lru_cache
+import yaml
+
+# libyaml's C loader when PyYAML was built with it, else the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+PROFILE_PATH = "config/profiles.yaml"
+
+
+@lru_cache(maxsize=8)
+def _load_yaml(path: str, mtime: float) -> dict:
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=_YAML_LOADER)
+
+
+def load_profile(path: str = PROFILE_PATH) -> dict:
+    """
+    Parsed profiles.yaml, shared across callers and re-read only when the
+    file's mtime changes. Treat the returned dict as read-only.
+    """
+    path = str(path)
+    return _load_yaml(path, os.path.getmtime(path))
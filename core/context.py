@@ -3,8 +3,8 @@
 from typing import List, Optional, Dict, Any
 from modules.memory import MemoryManager, MemoryItem
 from core.session import MultiMCP  # For dispatcher typing
+from core.config import load_profile
 from pathlib import Path
-import yaml
 import time
 import uuid
 from datetime import datetime
@@ -20,8 +20,7 @@ class StrategyProfile(BaseModel):
 
 class AgentProfile:
     def __init__(self):
-        with open("config/profiles.yaml", "r") as f:
-            config = yaml.safe_load(f)
+        config = load_profile()
 
         self.name = config["agent"]["name"]
         self.id = config["agent"]["id"]
@@ -15,33 +15,29 @@ import json
 try:
     from agent import log
 except ImportError:
-    import datetime
-    from pathlib import Path
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        log_msg = f"[{now}] [{stage}] {msg}"
-        print(log_msg)
-        # Write to log file
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / "agent.log"
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_msg + '\n')
-        except Exception:
-            pass
+    from modules._logutil import log
+
+MAX_MEMORY_ITEMS_LOGGED = 20
+
+_SOLVE_DEF_RE = re.compile(r"^\s*(?:async\s+)?def\s+solve\s*\(", re.MULTILINE)
+
+# Body of a "result" string: plain chars or backslash escapes. Each char has
+# one way to match, so there is no catastrophic backtracking when the
+# closing quote is missing.
+_TOOL_RESULT_RE = re.compile(r'"result":\s*"((?:[^"\\]|\\.)*)"')
 
 def clean_tool_result(content: str) -> str:
     """Clean and format tool results for better readability"""
     try:
-        # Check if content contains MCP result format with TextContent
-        if "content=[TextContent(" in content and '"result":' in content:
+        # Cheap literal check first: only MCP TextContent results need unwrapping
+        if "content=[TextContent(" in content:
             # Extract the JSON result from the TextContent
-            match = re.search(r'"result":\s*"([^"]*(?:\\.[^"]*)*)"', content)
+            match = _TOOL_RESULT_RE.search(content)
             if match:
                 json_str = match.group(1)
-                # Unescape the JSON string
-                decoded = json_str.encode().decode('unicode_escape')
+                # Unescape the string; non-Latin-1 chars are turned into \u escapes
+                # first so unicode_escape does not mangle them
+                decoded = json_str.encode("latin-1", "backslashreplace").decode("unicode_escape")
                 return decoded
         return content
     except Exception:
@@ -97,13 +93,18 @@ class AgentLoop:
                     break
 
                 # === Planning ===
-                log("memory", "=" * 50)
-                log("memory", "MEMORY STEP")
                 memory_items = self.context.memory.get_session_items()
-                log("memory", f"Retrieved {len(memory_items)} memory items")
-                for i, item in enumerate(memory_items):
-                    log("memory", f"  Item {i+1}: {item.text[:100]}...")
-                log("memory", "=" * 50)
+                # One log call for the whole block, showing only the latest items
+                skipped = max(0, len(memory_items) - MAX_MEMORY_ITEMS_LOGGED)
+                lines = ["=" * 50, "MEMORY STEP", f"Retrieved {len(memory_items)} memory items"]
+                if skipped:
+                    lines.append(f"  ... {skipped} older items not shown")
+                lines.extend(
+                    f"  Item {i}: {item.text[:100]}..."
+                    for i, item in enumerate(memory_items[skipped:], start=skipped + 1)
+                )
+                lines.append("=" * 50)
+                log("memory", "\n".join(lines))
                 
                 tool_descriptions = summarize_tools(selected_tools)
                 prompt_path = select_decision_prompt_path(
@@ -123,7 +124,7 @@ class AgentLoop:
                 #print(f"[plan] {plan}")
 
                 # === Execution ===
-                if re.search(r"^\s*(async\s+)?def\s+solve\s*\(", plan, re.MULTILINE):
+                if _SOLVE_DEF_RE.search(plan):
                     log("loop", "Detected solve() plan — running sandboxed...")
 
                     self.context.log_subtask(tool_name="solve_sandbox", status="pending")
@@ -145,7 +146,7 @@ class AgentLoop:
                             )
                             return {"status": "done", "result": self.context.final_answer}
                         elif result.startswith("FURTHER_PROCESSING_REQUIRED:"):
-                            content = result.split("FURTHER_PROCESSING_REQUIRED:")[1].strip()
+                            content = result.removeprefix("FURTHER_PROCESSING_REQUIRED:").strip()
                             # Clean and format the content for better readability
                             cleaned_content = clean_tool_result(content)
                             self.context.user_input_override = (
@@ -1,41 +1,50 @@
-import requests
-import json
+import asyncio
+import httpx
 
-def check_server(base_url, name):
-    print(f"\n--- Checking {name} ({base_url}) ---")
-    
-    # List models
-    try:
-        print(f"Listing models at {base_url}/api/tags...")
-        resp = requests.get(f"{base_url}/api/tags", timeout=5)
-        print(f"Tags Status: {resp.status_code}")
-        if resp.status_code == 200:
-            models = [m['name'] for m in resp.json().get('models', [])]
-            print(f"Available models: {models}")
-            if "nomic-embed-text:latest" in models:
-                print("✅ nomic-embed-text:latest is available!")
+async def check_server(base_url, name):
+    # Both servers are probed concurrently, so buffer output and print it in one block
+    out = [f"\n--- Checking {name} ({base_url}) ---"]
+
+    # One client per host: tags and embeddings share the same connection
+    async with httpx.AsyncClient(base_url=base_url, timeout=5) as client:
+        # List models
+        try:
+            out.append(f"Listing models at {base_url}/api/tags...")
+            resp = await client.get("/api/tags")
+            out.append(f"Tags Status: {resp.status_code}")
+            if resp.status_code == 200:
+                models = [m['name'] for m in resp.json().get('models', [])]
+                out.append(f"Available models: {models}")
+                if "nomic-embed-text:latest" in models:
+                    out.append("✅ nomic-embed-text:latest is available!")
+                else:
+                    out.append("❌ nomic-embed-text:latest is NOT found.")
+            else:
+                out.append(f"Tags Error: {resp.text}")
+        except Exception as e:
+            out.append(f"Tags Exception: {e}")
+
+        # Try embedding
+        try:
+            out.append(f"Testing embedding at {base_url}/api/embeddings...")
+            resp = await client.post(
+                "/api/embeddings",
+                json={"model": "nomic-embed-text:latest", "prompt": "test"},
+            )
+            out.append(f"Embed Status: {resp.status_code}")
+            if resp.status_code == 200:
+                out.append("✅ Embedding success!")
             else:
-                print("❌ nomic-embed-text:latest is NOT found.")
-        else:
-            print(f"Tags Error: {resp.text}")
-    except Exception as e:
-        print(f"Tags Exception: {e}")
+                out.append(f"❌ Embed Error: {resp.text}")
+        except Exception as e:
+            out.append(f"Embed Exception: {e}")
+
+    print("\n".join(out))
 
-    # Try embedding
-    try:
-        print(f"Testing embedding at {base_url}/api/embeddings...")
-        resp = requests.post(
-            f"{base_url}/api/embeddings", 
-            json={"model": "nomic-embed-text:latest", "prompt": "test"}, 
-            timeout=5
-        )
-        print(f"Embed Status: {resp.status_code}")
-        if resp.status_code == 200:
-            print("✅ Embedding success!")
-        else:
-            print(f"❌ Embed Error: {resp.text}")
-    except Exception as e:
-        print(f"Embed Exception: {e}")
+async def main():
+    await asyncio.gather(
+        check_server("http://localhost:8080", "Port 8080"),
+        check_server("http://localhost:11434", "Port 11434"),
+    )
 
-check_server("http://localhost:8080", "Port 8080")
-check_server("http://localhost:11434", "Port 11434")
+asyncio.run(main())
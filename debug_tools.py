@@ -1,16 +1,15 @@
 
 import asyncio
 from core.session import MultiMCP
-import yaml
+from core.config import load_profile
 import os
 import json
 
 async def main():
     # Load config to get servers
-    with open("config/profiles.yaml", "r") as f:
-        profile = yaml.safe_load(f)
-        mcp_servers_list = profile.get("mcp_servers", [])
-        mcp_servers = {server["id"]: server for server in mcp_servers_list}
+    profile = load_profile()
+    mcp_servers_list = profile.get("mcp_servers", [])
+    mcp_servers = {server["id"]: server for server in mcp_servers_list}
 
     multi_mcp = MultiMCP(server_configs=list(mcp_servers.values()))
     await multi_mcp.initialize()
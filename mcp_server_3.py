@@ -1,13 +1,15 @@
 from mcp.server.fastmcp import FastMCP, Context
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from typing import List, Dict, Optional, Any
 from dataclasses import dataclass
 import sys
 import traceback
 import asyncio
-from datetime import datetime, timedelta
-import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+import json
 from models import SearchInput, UrlInput
 from models import PythonCodeOutput  # Import the models we need
 import os
@@ -16,6 +18,59 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+try:
+    import orjson  # optional, faster JSON parsing
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# HTTP/2 needs the optional h2 package; without it the pooled client still
+# keeps HTTP/1.1 connections alive
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Process-wide pooled client shared by search and page fetches, created on
+    first use inside the server's event loop.
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=_HTTP2,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+        )
+    return _http_client
+
+
+async def _close_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+# fetch_and_parse only returns 8000 chars, so there is no point parsing
+# (or even downloading) more than this much HTML
+MAX_HTML_BYTES = 256 * 1024
+
+# Only <title> and <body> subtrees are built into the soup; the rest of <head>
+# (inline styles, scripts, meta) is skipped during parsing. A strainer cannot
+# drop a subtree's text, so in-body boilerplate is still removed afterwards.
+_PAGE_STRAINER = SoupStrainer(["title", "body"])
+_BOILERPLATE_TAGS = ["script", "style", "nav", "header", "footer", "noscript", "svg"]
+
+# Identical searches within this window are answered from memory
+SEARCH_CACHE_TTL_SECONDS = 300
+SEARCH_CACHE_MAX_ENTRIES = 128
+
 
 @dataclass
 class SearchResult:
@@ -28,20 +83,21 @@ class SearchResult:
 class RateLimiter:
     def __init__(self, requests_per_minute: int = 30):
         self.requests_per_minute = requests_per_minute
-        self.requests = []
+        # Monotonic timestamps of recent requests, oldest first
+        self.requests = deque()
 
     async def acquire(self):
-        now = datetime.now()
+        now = time.monotonic()
         # Remove requests older than 1 minute
-        self.requests = [
-            req for req in self.requests if now - req < timedelta(minutes=1)
-        ]
+        while self.requests and now - self.requests[0] >= 60.0:
+            self.requests.popleft()
 
         if len(self.requests) >= self.requests_per_minute:
             # Wait until we can make another request
-            wait_time = 60 - (now - self.requests[0]).total_seconds()
+            wait_time = 60.0 - (now - self.requests[0])
             if wait_time > 0:
                 await asyncio.sleep(wait_time)
+                now = time.monotonic()
 
         self.requests.append(now)
 
@@ -62,21 +118,27 @@ class DuckDuckGoSearcher:
         self.google_cx = os.getenv("GOOGLE_CSE_ID")
         # (SerpAPI disabled for now; using pure Google Custom Search)
         self.serpapi_key = None  # previously: os.getenv("SERPAPI_KEY")
+        # (query, max_results) -> (monotonic time stored, ETag, results), oldest first
+        self._cache: Dict[tuple, tuple] = {}
+
+    def _cache_put(self, key: tuple, etag: Optional[str], results: List[SearchResult]):
+        # Re-insert so insertion order stays oldest-first for FIFO eviction
+        self._cache.pop(key, None)
+        self._cache[key] = (time.monotonic(), etag, results)
+        if len(self._cache) > SEARCH_CACHE_MAX_ENTRIES:
+            del self._cache[next(iter(self._cache))]
 
     def format_results_for_llm(self, results: List[SearchResult]) -> str:
         """Format results in a natural language style that's easier for LLMs to process"""
         if not results:
             return "No results were found for your search query. The query may not have returned any matches. Please try rephrasing your search."
 
-        output = []
-        output.append(f"Found {len(results)} search results:\n")
-
-        for result in results:
-            output.append(f"{result.position}. {result.title}")
-            output.append(f"   URL: {result.link}")
-            output.append(f"   Summary: {result.snippet}")
-            output.append("")  # Empty line between results
-
+        output = [f"Found {len(results)} search results:\n"]
+        # One entry per result; the trailing newline leaves an empty line between results
+        output.extend(
+            f"{r.position}. {r.title}\n   URL: {r.link}\n   Summary: {r.snippet}\n"
+            for r in results
+        )
         return "\n".join(output)
 
     async def search(
@@ -88,6 +150,12 @@ class DuckDuckGoSearcher:
                 await ctx.error("Google API credentials not configured. Please set GOOGLE_API_KEY and GOOGLE_CSE_ID in .env file")
                 return []
             
+            key = (query, max_results)
+            cached = self._cache.get(key)
+            if cached and time.monotonic() - cached[0] < SEARCH_CACHE_TTL_SECONDS:
+                await ctx.info(f"Returning {len(cached[2])} cached results for this query")
+                return list(cached[2])
+
             await ctx.info("Using Google Custom Search API for web search")
             params = {
                 "key": self.google_api_key,
@@ -95,32 +163,39 @@ class DuckDuckGoSearcher:
                 "q": query,
                 "num": max_results,
             }
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                resp = await client.get(
-                    "https://www.googleapis.com/customsearch/v1",
-                    params=params,
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                items = data.get("items", [])
-                results: List[SearchResult] = []
-                for i, item in enumerate(items, start=1):
-                    results.append(
-                        SearchResult(
-                            title=item.get("title", ""),
-                            link=item.get("link", ""),
-                            snippet=item.get("snippet", ""),
-                            position=i,
-                        )
+            # Revalidate an expired entry with its ETag; 304 means it is still current
+            headers = {"If-None-Match": cached[1]} if cached and cached[1] else None
+            resp = await _get_client().get(
+                "https://www.googleapis.com/customsearch/v1",
+                params=params,
+                headers=headers,
+            )
+            if resp.status_code == 304 and cached:
+                self._cache_put(key, resp.headers.get("ETag", cached[1]), cached[2])
+                await ctx.info(f"Google CSE results unchanged, reusing {len(cached[2])} cached results")
+                return list(cached[2])
+            resp.raise_for_status()
+            data = _json_loads(resp.content)
+            items = data.get("items", [])
+            results: List[SearchResult] = []
+            for i, item in enumerate(items, start=1):
+                results.append(
+                    SearchResult(
+                        title=item.get("title", ""),
+                        link=item.get("link", ""),
+                        snippet=item.get("snippet", ""),
+                        position=i,
                     )
-                    if len(results) >= max_results:
-                        break
-                if results:
-                    await ctx.info(f"Successfully found {len(results)} results via Google CSE")
-                    return results
-                else:
-                    await ctx.info("Google CSE returned no results for this query")
-                    return []
+                )
+                if len(results) >= max_results:
+                    break
+            if results:
+                self._cache_put(key, resp.headers.get("ETag"), results)
+                await ctx.info(f"Successfully found {len(results)} results via Google CSE")
+                return results
+            else:
+                await ctx.info("Google CSE returned no results for this query")
+                return []
 
         except httpx.TimeoutException:
             await ctx.error("Search request timed out")
@@ -138,6 +213,19 @@ class WebContentFetcher:
     def __init__(self):
         self.rate_limiter = RateLimiter(requests_per_minute=20)
 
+    @staticmethod
+    async def _read_capped(response: httpx.Response, limit: int) -> str:
+        """Decoded body of a streamed response, stopping after `limit` bytes"""
+        buf = bytearray()
+        async for chunk in response.aiter_bytes():
+            buf += chunk
+            if len(buf) >= limit:
+                break
+        try:
+            return buf[:limit].decode(response.charset_encoding or "utf-8", errors="replace")
+        except LookupError:
+            return buf[:limit].decode("utf-8", errors="replace")
+
     async def fetch_and_parse(self, url: str, ctx: Context) -> str:
         """Fetch and parse content from a webpage"""
         try:
@@ -145,34 +233,27 @@ class WebContentFetcher:
 
             await ctx.info(f"Fetching content from: {url}")
 
-            async with httpx.AsyncClient() as client:
-                result = await client.get(
-                    url,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                    },
-                    follow_redirects=True,
-                    timeout=30.0,
-                )
+            async with _get_client().stream(
+                "GET",
+                url,
+                headers={
+                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                },
+                follow_redirects=True,
+                timeout=30.0,
+            ) as result:
                 result.raise_for_status()
+                html = await self._read_capped(result, MAX_HTML_BYTES)
 
-            # Parse the HTML
-            soup = BeautifulSoup(result.text, "html.parser")
+            # Parse the HTML (lxml's C parser is much faster than html.parser)
+            soup = BeautifulSoup(html, "lxml", parse_only=_PAGE_STRAINER)
 
             # Remove script and style elements
-            for element in soup(["script", "style", "nav", "header", "footer"]):
+            for element in soup.find_all(_BOILERPLATE_TAGS):
                 element.decompose()
 
-            # Get the text content
-            text = soup.get_text()
-
-            # Clean up the text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = " ".join(chunk for chunk in chunks if chunk)
-
-            # Remove extra whitespace
-            text = re.sub(r"\s+", " ", text).strip()
+            # Get the text content with whitespace collapsed in a single pass
+            text = " ".join(soup.get_text(separator=" ").split())
 
             # Truncate if too long
             if len(text) > 8000:
@@ -194,12 +275,22 @@ class WebContentFetcher:
             return f"Error: An unexpected error occurred while fetching the webpage ({str(e)})"
 
 
-# Initialize FastMCP server
-mcp = FastMCP("ddg-search")
 searcher = DuckDuckGoSearcher()
 fetcher = WebContentFetcher()
 
 
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    try:
+        yield
+    finally:
+        await _close_client()
+
+
+# Initialize FastMCP server
+mcp = FastMCP("ddg-search", lifespan=lifespan)
+
+
 @mcp.tool()
 async def duckduckgo_search_results(input: SearchInput, ctx: Context) -> str:
     """Search the web using Google Custom Search API. Usage: input={"input": {"query": "latest AI developments", "max_results": 5} } result = await mcp.call_tool('duckduckgo_search_results', input)"""
@@ -219,6 +310,12 @@ async def download_raw_html_from_url(input: UrlInput, ctx: Context) -> str:
 
 if __name__ == "__main__":
     print("mcp_server_3.py starting")
+    # libuv-based event loop when available; FastMCP's anyio.run picks it up via the policy
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     if len(sys.argv) > 1 and sys.argv[1] == "dev":
             mcp.run()  # Run without transport for dev server
     else:
@@ -0,0 +1,99 @@
+# modules/_logutil.py
+
+import asyncio
+import atexit
+import os
+import time
+from pathlib import Path
+
+# Shared logger: agent.py re-exports this log, and modules that cannot import
+# agent.log (e.g. while agent.py itself is still importing them) use it
+# directly, so every line reaches agent.log through the same ordered writer
+
+LOG_FILE = Path("logs") / "agent.log"
+
+# Inside an event loop, lines are queued and written by a background task:
+# at most LOG_BATCH_MAX lines per write, gathered over LOG_BATCH_WINDOW seconds
+LOG_BATCH_MAX = 64
+LOG_BATCH_WINDOW = 0.05
+
+_log_fd = None
+_log_queue = None
+_log_loop = None
+_log_task = None
+
+
+def _get_log_fd() -> int:
+    global _log_fd
+    if _log_fd is None:
+        LOG_FILE.parent.mkdir(exist_ok=True)
+        # Raw append-mode fd opened once: each batch is a single write() syscall
+        _log_fd = os.open(LOG_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    return _log_fd
+
+
+def _write_lines(lines):
+    if not lines:
+        return
+    try:
+        os.write(_get_log_fd(), "".join(lines).encode("utf-8"))
+    except Exception as e:
+        print(f"[{time.strftime('%H:%M:%S')}] [log] Failed to write to log file: {e}")
+
+
+def _drain() -> list:
+    lines = []
+    while _log_queue is not None and not _log_queue.empty():
+        lines.append(_log_queue.get_nowait())
+    return lines
+
+
+async def _log_writer(queue: asyncio.Queue):
+    lines = []
+    try:
+        while True:
+            lines.append(await queue.get())
+            await asyncio.sleep(LOG_BATCH_WINDOW)
+            while len(lines) < LOG_BATCH_MAX and not queue.empty():
+                lines.append(queue.get_nowait())
+            _write_lines(lines)
+            lines = []
+    finally:
+        # Cancelled at loop shutdown: write whatever is still pending
+        while not queue.empty():
+            lines.append(queue.get_nowait())
+        _write_lines(lines)
+
+
+def _enqueue(line: str):
+    global _log_queue, _log_loop, _log_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # No event loop: keep ordering by flushing queued lines first
+        _write_lines(_drain() + [line])
+        return
+    if loop is not _log_loop or _log_task.done():
+        _write_lines(_drain())
+        _log_queue = asyncio.Queue()
+        _log_loop = loop
+        _log_task = loop.create_task(_log_writer(_log_queue))
+    _log_queue.put_nowait(line)
+
+
+@atexit.register
+def _close():
+    global _log_fd
+    _write_lines(_drain())
+    if _log_fd is not None:
+        os.close(_log_fd)
+        _log_fd = None
+
+
+def log(stage: str, msg: str):
+    """Timestamped logger that writes to both console and file."""
+    now = time.strftime("%H:%M:%S")
+    log_msg = f"[{now}] [{stage}] {msg}"
+    print(log_msg)
+    # Write to log file
+    _enqueue(log_msg + "\n")
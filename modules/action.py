@@ -5,27 +5,15 @@ from pydantic import BaseModel
 import asyncio
 import types
 import json
+import os
+import re
 
 
 # Optional logging fallback
 try:
     from agent import log
 except ImportError:
-    import datetime
-    from pathlib import Path
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        log_msg = f"[{now}] [{stage}] {msg}"
-        print(log_msg)
-        # Write to log file
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / "agent.log"
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_msg + '\n')
-        except Exception:
-            pass
+    from modules._logutil import log
 
 class ToolCallResult(BaseModel):
     tool_name: str
@@ -34,6 +22,55 @@ class ToolCallResult(BaseModel):
     raw_response: Any
 
 MAX_TOOL_CALLS_PER_PLAN = 5
+_MAX_ERR = f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan."
+
+# Per-tool-call log lines format the full args/result, so only emit them when
+# AGENT_DEBUG=1
+_DEBUG = os.getenv("AGENT_DEBUG") == "1"
+
+# Compiled solve() plans keyed by source, so retried plans skip compile()
+MAX_CACHED_PLANS = 64
+_CODE_CACHE: Dict[str, types.CodeType] = {}
+
+
+def _compile_plan(code: str) -> types.CodeType:
+    co = _CODE_CACHE.get(code)
+    if co is None:
+        co = compile(code, "<solve_plan>", "exec")
+        if len(_CODE_CACHE) >= MAX_CACHED_PLANS:
+            # Evict the oldest plan
+            del _CODE_CACHE[next(iter(_CODE_CACHE))]
+        _CODE_CACHE[code] = co
+    return co
+
+
+class SandboxMCP:
+    """MCP client handed to solve() plans; forwards to the real dispatcher"""
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.call_count = 0
+
+    async def call_tool(self, tool_name: str, input_dict: dict):
+        self.call_count += 1
+        if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
+            raise RuntimeError(_MAX_ERR)
+        # REAL tool call now
+        if _DEBUG:
+            log("action", f"Calling tool: {tool_name} with args: {input_dict}")
+        result = await self.dispatcher.call_tool(tool_name, input_dict)
+        if _DEBUG:
+            log("action", f"Tool result: {result}")
+        return result
+
+
+# Globals every plan starts from (safe built-ins preloaded); copied per run
+_SANDBOX_BASE = {
+    "__name__": "sandbox",
+    "__builtins__": __builtins__,
+    "json": json,
+    "re": re,
+}
+
 
 async def run_python_sandbox(code: str, dispatcher: Any) -> str:
     log("action", "=" * 50)
@@ -41,37 +78,15 @@ async def run_python_sandbox(code: str, dispatcher: Any) -> str:
     log("action", f"Code to execute:\n{code}")
     log("action", "=" * 50)
 
-    # Create a fresh module scope
-    sandbox = types.ModuleType("sandbox")
+    # Fresh scope per run, with the MCP client patched to the real dispatcher
+    sandbox = _SANDBOX_BASE.copy()
+    sandbox["mcp"] = SandboxMCP(dispatcher)
 
     try:
-        # Patch MCP client with real dispatcher
-        class SandboxMCP:
-            def __init__(self, dispatcher):
-                self.dispatcher = dispatcher
-                self.call_count = 0
-
-            async def call_tool(self, tool_name: str, input_dict: dict):
-                self.call_count += 1
-                if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
-                    raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
-                # REAL tool call now
-                log("action", f"Calling tool: {tool_name} with args: {input_dict}")
-                result = await self.dispatcher.call_tool(tool_name, input_dict)
-                log("action", f"Tool result: {result}")
-                return result
-
-        sandbox.mcp = SandboxMCP(dispatcher)
-
-        # Preload safe built-ins into the sandbox
-        import json, re
-        sandbox.__dict__["json"] = json
-        sandbox.__dict__["re"] = re
-
         # Execute solve fn dynamically
-        exec(compile(code, "<solve_plan>", "exec"), sandbox.__dict__)
+        exec(_compile_plan(code), sandbox)
 
-        solve_fn = sandbox.__dict__.get("solve")
+        solve_fn = sandbox.get("solve")
         if solve_fn is None:
             raise ValueError("No solve() function found in plan.")
 
@@ -86,7 +101,7 @@ async def run_python_sandbox(code: str, dispatcher: Any) -> str:
         elif isinstance(result, dict):
             return f"{json.dumps(result)}"
         elif isinstance(result, list):
-            return f"{' '.join(str(r) for r in result)}"
+            return " ".join([str(r) for r in result])
         else:
             return f"{result}"
 
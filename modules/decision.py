@@ -9,24 +9,12 @@ import re
 try:
     from agent import log
 except ImportError:
-    import datetime
-    from pathlib import Path
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        log_msg = f"[{now}] [{stage}] {msg}"
-        print(log_msg)
-        # Write to log file
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / "agent.log"
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_msg + '\n')
-        except Exception:
-            pass
+    from modules._logutil import log
 
 model = ModelManager()
 
+_SOLVE_RE = re.compile(r"^\s*(?:async\s+)?def\s+solve\s*\(", re.MULTILINE)
+
 
 # prompt_path = "prompts/decision_prompt.txt"
 
@@ -76,7 +64,7 @@ async def generate_plan(
             if raw.lower().startswith("python"):
                 raw = raw[len("python"):].strip()
 
-        if re.search(r"^\s*(async\s+)?def\s+solve\s*\(", raw, re.MULTILINE):
+        if _SOLVE_RE.search(raw):
             return raw  # ✅ Correct, it's a full function
         elif "FINAL_ANSWER:" in raw:
             return raw # ✅ Correct, it's a final answer
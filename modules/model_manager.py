@@ -1,10 +1,10 @@
 import os
 import json
-import yaml
 import requests
 from pathlib import Path
 from google import genai
 from dotenv import load_dotenv
+from core.config import load_profile
 
 load_dotenv()
 
@@ -15,7 +15,7 @@ PROFILE_YAML = ROOT / "config" / "profiles.yaml"
 class ModelManager:
     def __init__(self):
         self.config = json.loads(MODELS_JSON.read_text())
-        self.profile = yaml.safe_load(PROFILE_YAML.read_text())
+        self.profile = load_profile(PROFILE_YAML)
 
         self.text_model_key = self.profile["llm"]["text_generation"]
         self.model_info = self.config["models"][self.text_model_key]
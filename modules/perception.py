@@ -1,6 +1,6 @@
 # modules/perception.py
 
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from modules.model_manager import ModelManager
 from modules.tools import load_prompt, extract_json_block
@@ -8,32 +8,46 @@ from core.context import AgentContext
 
 import json
 
+try:
+    import orjson  # optional, faster JSON parsing
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # Optional logging fallback
 try:
     from agent import log
 except ImportError:
-    import datetime
-    from pathlib import Path
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        log_msg = f"[{now}] [{stage}] {msg}"
-        print(log_msg)
-        # Write to log file
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-        log_file = log_dir / "agent.log"
-        try:
-            with open(log_file, 'a', encoding='utf-8') as f:
-                f.write(log_msg + '\n')
-        except Exception:
-            pass
+    from modules._logutil import log
 
 model = ModelManager()
 
 
 prompt_path = "prompts/perception_prompt.txt"
 
+# id(server descriptions dict) -> (that dict, formatted server list). The dict is
+# built once in agent.main and reused, so the list only needs formatting once;
+# holding the dict keeps its id from being reused by another object.
+_SERVERS_TEXT_CACHE: Dict[int, Tuple[dict, str]] = {}
+
+
+def _servers_text(mcp_server_descriptions: dict) -> str:
+    cached = _SERVERS_TEXT_CACHE.get(id(mcp_server_descriptions))
+    if cached is not None:
+        return cached[1]
+
+    server_list = []
+    for server_id, server_info in mcp_server_descriptions.items():
+        description = server_info.get("description", "No description available")
+        server_list.append(f"- {server_id}: {description}")
+    servers_text = "\n".join(server_list)
+
+    if len(_SERVERS_TEXT_CACHE) >= 8:
+        _SERVERS_TEXT_CACHE.clear()
+    _SERVERS_TEXT_CACHE[id(mcp_server_descriptions)] = (mcp_server_descriptions, servers_text)
+    return servers_text
+
+
 class PerceptionResult(BaseModel):
     intent: str
     entities: List[str] = []
@@ -46,12 +60,7 @@ async def extract_perception(user_input: str, mcp_server_descriptions: dict) ->
     Extracts perception details and selects relevant MCP servers based on the user query.
     """
 
-    server_list = []
-    for server_id, server_info in mcp_server_descriptions.items():
-        description = server_info.get("description", "No description available")
-        server_list.append(f"- {server_id}: {description}")
-
-    servers_text = "\n".join(server_list)
+    servers_text = _servers_text(mcp_server_descriptions)
 
     prompt_template = load_prompt(prompt_path)
     
@@ -76,7 +85,7 @@ async def extract_perception(user_input: str, mcp_server_descriptions: dict) ->
 
         # Try parsing into PerceptionResult
         json_block = extract_json_block(raw)
-        result = json.loads(json_block)
+        result = _json_loads(json_block)
 
         # If selected_servers missing, fallback
         if "selected_servers" not in result:
@@ -1,6 +1,8 @@
 # modules/tools.py
 
 from typing import List, Dict, Optional, Any
+from functools import lru_cache
+import os
 import re
 
 def extract_json_block(text: str) -> str:
@@ -48,6 +50,13 @@ def tool_expects_input(self, tool_name: str) -> bool:
     return list(tool.parameters.keys()) == ['input']
 
 
-def load_prompt(path: str) -> str:
+@lru_cache(maxsize=16)
+def _read_prompt(path: str, mtime: float) -> str:
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
+
+
+def load_prompt(path: str) -> str:
+    """Prompt template text, read from disk only when the file's mtime changes."""
+    path = str(path)
+    return _read_prompt(path, os.path.getmtime(path))
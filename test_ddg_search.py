@@ -11,6 +11,7 @@ import asyncio
 import httpx
 from bs4 import BeautifulSoup
 import urllib.parse
+from selectolax.lexbor import LexborHTMLParser
 import os
 from dotenv import load_dotenv
 
@@ -24,6 +25,27 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
     "Referer": "https://duckduckgo.com/",
 }
+# Cap on in-flight provider requests when main() fans out the test queries
+MAX_CONCURRENT_REQUESTS = 4
+
+def parse_ddg_results(html: str):
+    """
+    Return (number of .result blocks, [(title, href, snippet), ...]),
+    parsed with selectolax's lexbor engine.
+    """
+    entries = []
+    nodes = LexborHTMLParser(html).css(".result")
+    for node in nodes:
+        link_elem = node.css_first(".result__title a")
+        if link_elem is None:
+            continue
+        snippet_elem = node.css_first(".result__snippet")
+        entries.append((
+            link_elem.text(strip=True),
+            link_elem.attributes.get("href") or "",
+            snippet_elem.text(strip=True) if snippet_elem else "",
+        ))
+    return len(nodes), entries
 
 async def test_ddg_html(query: str):
     print(f"\n{'='*60}")
@@ -50,11 +72,12 @@ async def test_ddg_html(query: str):
             
             # Parse results
             print("\nStep 3: Parsing HTML...")
-            soup = BeautifulSoup(result.text, "html.parser")
-            results = soup.select(".result")
-            print(f"  ✓ Found {len(results)} .result elements")
+            found, entries = parse_ddg_results(result.text)
+            print(f"  ✓ Found {found} .result elements")
             
-            if not results:
+            if not found:
+                # Rare diagnostic path, BeautifulSoup is fine here
+                soup = BeautifulSoup(result.text, "lxml")
                 print("\n  ⚠ No .result elements found. Checking page structure...")
                 print(f"  - Title tag: {soup.title.string if soup.title else 'None'}")
                 print(f"  - Body classes: {soup.body.get('class') if soup.body else 'None'}")
@@ -70,18 +93,7 @@ async def test_ddg_html(query: str):
             
             # Display results
             print("\nStep 4: Extracting search results...")
-            for i, result_elem in enumerate(results[:5], 1):
-                title_elem = result_elem.select_one(".result__title")
-                if not title_elem:
-                    continue
-                
-                link_elem = title_elem.find("a")
-                if not link_elem:
-                    continue
-                
-                title = link_elem.get_text(strip=True)
-                link = link_elem.get("href", "")
-                
+            for i, (title, link, snippet) in enumerate(entries[:5], 1):
                 # Skip ads
                 if "y.js" in link:
                     continue
@@ -93,9 +105,6 @@ async def test_ddg_html(query: str):
                     except Exception:
                         pass
                 
-                snippet_elem = result_elem.select_one(".result__snippet")
-                snippet = snippet_elem.get_text(strip=True) if snippet_elem else ""
-                
                 print(f"\n{i}. {title}")
                 print(f"   URL: {link}")
                 print(f"   Snippet: {snippet[:100]}...")
@@ -172,14 +181,24 @@ async def main():
         "relationship between Gensol and Go-Auto"
     ]
     
+    # Run every query against both providers concurrently, at most
+    # MAX_CONCURRENT_REQUESTS at a time (progress output will interleave)
+    sem = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def limited(coro):
+        async with sem:
+            return await coro
+
+    outcomes = await asyncio.gather(*(
+        asyncio.gather(limited(test_ddg_html(query)), limited(test_google_cse_search(query)))
+        for query in test_queries
+    ))
+
     results = {}
-    for query in test_queries:
-        ddg_success = await test_ddg_html(query)
-        cse_success = await test_google_cse_search(query)
+    for query, (ddg_success, cse_success) in zip(test_queries, outcomes):
         results[query] = (
             f"DDG_HTML: {'✓' if ddg_success else '✗'} | GoogleCSE: {'✓' if cse_success else '✗'}"
         )
-        await asyncio.sleep(1)  # Pause between requests
     
     # Summary
     print(f"\n\n{'='*60}")
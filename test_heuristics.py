@@ -3,6 +3,8 @@ Test script for heuristics validation
 Run this to verify that input sanitization and validation are working correctly.
 """
 
+import time
+
 from Heuristics import run_heuristics
 
 # Mock list of allowed tools
@@ -93,7 +95,55 @@ def test_heuristics():
     print(f"   Valid: {result.is_valid}")
     if not result.is_valid:
         print(f"   Error: {result.sanitized_query}")
-    
+
+    # Test 11: Brace flood (should finish quickly, no regex backtracking blow-up)
+    print("\n11. Brace Flood (ReDoS) Test:")
+    flood = "query:{" * 500_000 + "{" * (1024 * 1024)  # ~4.5MB, under the size limit
+    start = time.perf_counter()
+    result = run_heuristics(flood, ALLOWED_TOOLS)
+    elapsed = time.perf_counter() - start
+    print(f"   Input: {'[query:{ x 500k + 1MB of {]'}")
+    print(f"   Valid: {result.is_valid}")
+    print(f"   Time: {elapsed:.2f}s")
+    assert elapsed < 30, "sanitize/validate regressed to superlinear time on nested braces"
+
+    # Test 12: Aho-Corasick keyword masking must agree with the union regex
+    print("\n12. Keyword Masking Consistency Test:")
+    from Heuristics import heuristics
+    samples = [
+        "Show me some xxx videos", "SEX ed", "sextant and unisex", "xxxx xxx.",
+        "adult videos", "porn_star", "a deep-throat b", "hookup-horny", "Nude, NUDE!",
+        "hookups", "pornography", "Nudes, sexy", "ſex tape", "café porn",
+    ]
+    for text in samples:
+        masked = heuristics._mask_keywords(text, heuristics._ADULT_AC, heuristics._ADULT_RE, "[ADULT_BLOCKED]")
+        expected = heuristics._ADULT_RE.sub("[ADULT_BLOCKED]", text)
+        assert masked == expected, f"automaton {masked!r} != regex {expected!r}"
+    print(f"   Checked {len(samples)} samples against _ADULT_RE: OK")
+    for text in ["hookups", "pornography"]:
+        result = run_heuristics(text, ALLOWED_TOOLS)
+        assert result.sanitized_query == "[ADULT_BLOCKED]", f"{text!r} was not masked"
+    for text in ["chinks", "kikes"]:
+        result = run_heuristics(text, ALLOWED_TOOLS)
+        assert result.sanitized_query == "[OFFENSIVE_CONTENT_REMOVED]", f"{text!r} was not masked"
+    print("   Plural and longer forms are masked: OK")
+
+    # Test 13: Tool reference split by a non-ASCII char (joined again by ASCII stripping)
+    print("\n13. Non-ASCII Split Tool Test:")
+    result = run_heuristics("use toéol:evil_tool now", ALLOWED_TOOLS)
+    print(f"   Input: 'use toéol:evil_tool now'")
+    print(f"   Valid: {result.is_valid}")
+    print(f"   Sanitized: '{result.sanitized_query}'")
+    assert "tool:evil_tool" not in result.sanitized_query, "unknown tool slipped through the fast path"
+
+    # Test 14: Secrets spelled with non-ASCII case variants (matched by re.I)
+    print("\n14. Non-ASCII Case Variant Secret Test:")
+    for text in ["my paſſword='hunter2'", "token ſk-abcdefghijklmnopqrstuv"]:
+        result = run_heuristics(text, ALLOWED_TOOLS)
+        print(f"   Input: {text!r}")
+        print(f"   Sanitized: '{result.sanitized_query}'")
+        assert "[REDACTED_SECRET]" in result.sanitized_query, "secret slipped through the fast path"
+
     print("\n" + "=" * 60)
     print("TESTS COMPLETE")
     print("=" * 60)